@@ -1,280 +1,429 @@
-import json, os, shutil, sys, tarfile
+import argparse, collections, concurrent.futures, functools, html, json, os, shutil, sys, tarfile
+import urllib.error
 import urllib.request
 import urllib.parse
-import xml.etree.ElementTree as ElementTree
+try:
+    import lxml.etree as ElementTree # C parser, much faster on large dictionaries
+    LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+    LXML = False
 from xml.etree.ElementTree import Element
-from typing import Optional, Dict, List
+from typing import Dict, List
+
+# namespace-qualified tags
+TEI_NS      = "{http://www.tei-c.org/ns/1.0}"
+TEI_ENTRY   = TEI_NS + "entry"
+TEI_FORM    = TEI_NS + "form"
+TEI_ORTH    = TEI_NS + "orth"
+TEI_PRON    = TEI_NS + "pron"
+TEI_GRAMGRP = TEI_NS + "gramGrp"
+TEI_GEN     = TEI_NS + "gen"
+TEI_POS     = TEI_NS + "pos"
+TEI_SENSE   = TEI_NS + "sense"
+TEI_CIT     = TEI_NS + "cit"
+TEI_QUOTE   = TEI_NS + "quote"
+TEI_DEF     = TEI_NS + "def"
+XI_INCLUDE  = "{http://www.w3.org/2001/XInclude}include"
 
 class DictSense:
+    __slots__ = ("quotes", "defs")
+
     def __init__(self):
-        self.quotes: Optional[List[str]] = None
-        self.defs:   Optional[List[str]] = None
+        self.quotes: List[str] = []
+        self.defs:   List[str] = []
 
 class DictEntry:
-    def __init__(self):
-        self.orth:   Optional[List[str]] = None
-        self.pron:   Optional[List[str]] = None
-        self.gen:    Optional[List[str]] = None
-        self.pos:    Optional[List[str]] = None
-        self.senses: Optional[List[str]] = None
+    __slots__ = ("orth", "pron", "gen", "pos", "senses")
 
-def http_get(url):
+    def __init__(self):
+        self.orth:   List[str] = []
+        self.pron:   List[str] = []
+        self.gen:    List[str] = []
+        self.pos:    List[str] = []
+        self.senses: List[DictSense] = []
+
+def write_file(path, data: bytes):
+    # write through a temporary file, so an interrupted run never leaves a
+    # truncated file behind
+    with open("%s.tmp" % path, "wb") as file:
+        file.write(data)
+    os.replace("%s.tmp" % path, path)
+
+def http_get(url, cache=None):
+    # with a cache file, send the stored etag and reuse the cached body
+    # when the server answers 304 (not modified)
     req = urllib.request.Request(url)
-    resp = urllib.request.urlopen(req)
-    return resp.read()
+    if cache is not None:
+        etag_path = "%s.etag" % cache
+        if os.path.isfile(cache) and os.path.isfile(etag_path):
+            with open(etag_path, encoding="latin-1") as file:
+                req.add_header("If-None-Match", file.read())
+    try:
+        resp = urllib.request.urlopen(req)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            with open(cache, "rb") as file:
+                return file.read()
+        raise
+    data = resp.read()
+    if cache is not None:
+        # drop the old etag first, so it is never paired with a new body
+        if os.path.isfile(etag_path):
+            os.remove(etag_path)
+        write_file(cache, data)
+        etag = resp.headers.get("ETag")
+        if etag is not None:
+            write_file(etag_path, etag.encode("latin-1"))
+    return data
 
 def http_download(url, path):
-    with open(path, "wb") as file:
-        file.write(http_get(url))
+    write_file(path, http_get(url))
 
 def get_freedict_database():
-    return json.loads(http_get("https://freedict.org/freedict-database.json"))
+    os.makedirs("data", exist_ok=True)
+    return json.loads(http_get("https://freedict.org/freedict-database.json", "data/freedict-database.json"))
 
 def load_freedict_database(filename):
     return json.load(open(filename))
 
+# convert to more common iso-639-1
+# https://en.wikipedia.org/wiki/List_of_ISO_639_language_codes
+ISO_MAP = {
+    "afr": "af",
+    "ara": "ar",
+    "bre": "br",
+    "bul": "bg",
+    "cat": "ca",
+    "ces": "cs",
+    "cym": "cy",
+    "dan": "da",
+    "deu": "de",
+    "ell": "el",
+    "eng": "en",
+    "epo": "eo",
+    "fin": "fi",
+    "fra": "fr",
+    "gla": "gd",
+    "gle": "ga",
+    "hin": "hi",
+    "hrv": "hr",
+    "hun": "hu",
+    "ind": "id",
+    "isl": "is",
+    "ita": "it",
+    "jpn": "ja",
+    "kur": "ku",
+    "lat": "la",
+    "lit": "lt",
+    "mkd": "mk",
+    "mlg": "mg",
+    "nld": "nl",
+    "nno": "nn",
+    "nob": "nb",
+    "nor": "no",
+    "oci": "oc",
+    "pol": "pl",
+    "por": "pt",
+    "rom": "ro", # should be ron
+    "rus": "ru",
+    "san": "sa",
+    "slk": "sk",
+    "slv": "sl",
+    "spa": "es",
+    "srp": "sr",
+    "swe": "sv",
+    "swh": "sw", # should be swa
+    "tur": "tr",
+    "wol": "wo",
+    "zho": "zh",
+}
+
+@functools.lru_cache(maxsize=None)
 def create_pair(src_lang, dst_lang):
-    # convert to more common iso-639-1
-    # https://en.wikipedia.org/wiki/List_of_ISO_639_language_codes
-    map = {
-        "afr": "af",
-        "ara": "ar",
-        "bre": "br",
-        "bul": "bg",
-        "cat": "ca",
-        "ces": "cs",
-        "cym": "cy",
-        "dan": "da",
-        "deu": "de",
-        "ell": "el",
-        "eng": "en",
-        "epo": "eo",
-        "fin": "fi",
-        "fra": "fr",
-        "gla": "gd",
-        "gle": "ga",
-        "hin": "hi",
-        "hrv": "hr",
-        "hun": "hu",
-        "ind": "id",
-        "isl": "is",
-        "ita": "it",
-        "jpn": "ja",
-        "kur": "ku",
-        "lat": "la",
-        "lit": "lt",
-        "mkd": "mk",
-        "mlg": "mg",
-        "nld": "nl",
-        "nno": "nn",
-        "nob": "nb",
-        "nor": "no",
-        "oci": "oc",
-        "pol": "pl",
-        "por": "pt",
-        "rom": "ro", # should be ron
-        "rus": "ru",
-        "san": "sa",
-        "slk": "sk",
-        "slv": "sl",
-        "spa": "es",
-        "srp": "sr",
-        "swe": "sv",
-        "swh": "sw", # should be swa
-        "tur": "tr",
-        "wol": "wo",
-        "zho": "zh",
-    }
-    if src_lang not in map:
+    if src_lang not in ISO_MAP:
         sys.stderr.write("error: mapping missing for %s" % src_lang)
         sys.exit(-1)
-    if dst_lang not in map:
+    if dst_lang not in ISO_MAP:
         sys.stderr.write("error: mapping missing for %s" % dst_lang)
         sys.exit(-1)
 
-    return "%s-%s" % (map[src_lang], map[dst_lang])
+    return "%s-%s" % (ISO_MAP[src_lang], ISO_MAP[dst_lang])
 
-def remove_namespace(element: Element):
-    if element.tag.startswith("{http://www.tei-c.org/ns/1.0}"):
-        element.tag = element.tag[len("{http://www.tei-c.org/ns/1.0}"):]
+def iterparse_with_parent(tei_path):
+    # yield (element, parent) for each finished entry or include
+    if LXML:
+        # single pass: lxml filters the tags in C and knows the parents
+        for _, element in ElementTree.iterparse(tei_path, events=("end",), tag=(TEI_ENTRY, XI_INCLUDE)):
+            yield element, element.getparent()
     else:
-        sys.stderr.write("ERROR: %s\n" % element.tag)
-
-def handle_includes(parent: Element, path):
-    entries = []
-    for subtree in parent:
-        if subtree.tag == "{http://www.w3.org/2001/XInclude}include":
-            href = subtree.get("href")
-            root = ElementTree.parse(path + "/" + href).getroot()
-            for entry in root:
-                entries.append(entry)
-    parent.clear()
-    parent.extend(entries)
-
-def handle_super_entries(parent: Element):
-    for super in parent.findall(".//{http://www.tei-c.org/ns/1.0}superEntry"):
-        for entry in super:
-            parent.append(entry)
-        parent.remove(super)
-
-def preprocess(element: Element, path):
-    # remove namespaces
-    remove_namespace(element)
-
-    # handle includes (for en-pl)
-    if element.tag == "body":
-        if len(element.findall(".//{http://www.w3.org/2001/XInclude}include")) > 0:
-            handle_includes(element, path)
-
-    # handle super entries
-    if element.tag == "body":
-        if len(element.findall(".//{http://www.tei-c.org/ns/1.0}superEntry")) > 0:
-            handle_super_entries(element)
-
-    # process leaf nodes
-    for child in element:
-        preprocess(child, path)
-
-    return element
-
-def collect_sense(element: Element, sense: DictSense, prefix):
-    # push
-    prefix.append(element.tag)
-    path = ".".join(prefix)
-
-    if path == "entry.sense.cit.quote":
-        if sense.quotes is None:
-            sense.quotes = [element.text]
+        parents = []
+        for event, element in ElementTree.iterparse(tei_path, events=("start", "end")):
+            if event == "start":
+                parents.append(element)
+                continue
+            parents.pop()
+            if element.tag == TEI_ENTRY or element.tag == XI_INCLUDE:
+                yield element, parents[-1]
+
+def iterparse_entries(tei_path):
+    # stream entries (including those inside super entries) one at a time,
+    # so only the entry being processed is kept in memory
+    for element, parent in iterparse_with_parent(tei_path):
+        if element.tag == TEI_ENTRY:
+            yield element
+            # release the processed entry
+            parent.remove(element)
         else:
-            sense.quotes.append(element.text)
-    elif path == "entry.sense.sense.def":
-        if sense.defs is None:
-            sense.defs = [element.text]
-        else:
-            sense.defs.append(element.text)
+            # handle includes (for en-pl)
+            href = element.get("href")
+            yield from iterparse_entries(os.path.join(os.path.dirname(tei_path), href))
 
-    # process leaf
+# walk the children once and dispatch on tag, which is much cheaper than
+# one findall() per field (lxml evaluates findall paths in Python)
+def collect_sense(element: Element, sense: DictSense):
     for child in element:
-        collect_sense(child, sense, prefix)
-
-    # pop
-    prefix.pop()
-
-def collect(element: Element, output: DictEntry, prefix):
-    # push
-    prefix.append(element.tag)
-    path = ".".join(prefix)
+        if child.tag == TEI_CIT:
+            for quote in child:
+                if quote.tag == TEI_QUOTE and quote.text is not None:
+                    sense.quotes.append(quote.text)
+        elif child.tag == TEI_SENSE:
+            for defn in child:
+                if defn.tag == TEI_DEF and defn.text is not None:
+                    sense.defs.append(defn.text)
+
+def collect(element: Element, output: DictEntry):
+    for child in element:
+        if child.tag == TEI_FORM:
+            for form in child:
+                if form.tag == TEI_ORTH:
+                    if form.text is not None: # <form><hi> data dropped
+                        output.orth.append(form.text)
+                elif form.tag == TEI_PRON:
+                    if form.text is not None:
+                        output.pron.append(form.text)
+        elif child.tag == TEI_GRAMGRP:
+            for gram in child:
+                if gram.tag == TEI_GEN:
+                    if gram.text is not None:
+                        output.gen.append(gram.text)
+                elif gram.tag == TEI_POS:
+                    if gram.text is not None and gram.text not in output.pos:
+                        output.pos.append(gram.text)
+        elif child.tag == TEI_SENSE:
+            sense = DictSense()
+            collect_sense(child, sense)
+            output.senses.append(sense)
 
-    if path == "entry.form.orth":
-        if element.text is not None: # <form><hi> data dropped
-            if output.orth is None:
-                output.orth = [element.text]
-            else:
-                output.orth.append(element.text)
-    elif path == "entry.form.pron":
-        if element.text is not None:
-            if output.pron is None:
-                output.pron = [element.text]
-            else:
-                output.pron.append(element.text)
-    elif path == "entry.gramGrp.gen":
-        if output.gen is None:
-            output.gen = [element.text]
+HTML_HEAD = (
+    '<!doctype html>\n'
+    '<html>\n'
+    '<head>\n'
+    '  <meta charset="utf-8">\n'
+    '  <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+    '  <title>FreeDicts</title>\n'
+    '  <link rel="stylesheet" href="dict.css">\n'
+    '  <link rel="icon" href="../favicon.ico">\n'
+    '</head>\n'
+    '<body>\n'
+)
+HTML_TAIL = (
+    '</body>\n'
+    '</html>\n'
+)
+
+def escape(text):
+    return html.escape(text)
+
+def generate_orths(entries: Dict[str, List[DictEntry]], html_path: str):
+    # several headwords can map to one file ("a b" is also written as a_b.html,
+    # and case-insensitive filesystems fold "Polish" and "polish"), so group
+    # the file names by lower case and let one thread write each group in
+    # sorted headword order: the last headword wins, as in a serial run
+    groups = {}
+    for orth in sorted(entries):
+        for name in {orth, orth.replace(" ", "_")}:
+            group = groups.setdefault(name.lower(), [])
+            group[:] = [item for item in group if item[0] != name]
+            group.append((name, orth))
+
+    def write_groups(batch):
+        # render in the worker, so a page is only in memory while it is
+        # written; return the names that failed
+        failed = []
+        for group in batch:
+            for name, orth in group:
+                filename = "%s/%s.html" % (html_path, name)
+                if not write_html(generate_html(orth, entries[orth]), filename):
+                    failed.append(name)
+        return failed
+
+    # groups are independent and writing them is I/O bound; hand each thread
+    # one batch instead of one future per group, which would cost more memory
+    # than the pages themselves
+    failed = set()
+    threads = 16
+    batch = list(groups.values())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        for names in executor.map(write_groups, [batch[i::threads] for i in range(threads)]):
+            failed.update(names)
+
+    return sum(1 for orth in entries if not failed.issuperset({orth, orth.replace(" ", "_")}))
+
+def generate_single_file(entries: Dict[str, List[DictEntry]], html_path: str):
+    # all headwords in one page, addressed by fragment (e.g., index.html#guten_Tag);
+    # "a b" and "a_b" share an id, the last in sorted order keeps it, as the
+    # file a_b.html does in per-headword mode
+    ids = {}
+    for orth in sorted(entries):
+        ids[orth.replace(" ", "_")] = orth
+    owners = {orth: section_id for section_id, orth in ids.items()}
+
+    buf = [HTML_HEAD]
+    for orth, orth_entries in entries.items():
+        if orth in owners:
+            buf.append('<section id="%s">\n' % escape(owners[orth]))
         else:
-            output.gen.append(element.text)
-    elif path == "entry.gramGrp.pos":
-        if element.text is not None:
-            if output.pos is None:
-                output.pos = [element.text]
-            else:
-                if element.text not in output.pos:
-                    output.pos.append(element.text)
-    elif path == "entry.sense":
-        prefix.pop()
-        sense = DictSense()
-        collect_sense(element, sense, prefix)
-        if output.senses is None:
-            output.senses = [sense]
+            buf.append('<section>\n')
+        generate_content(buf, orth, orth_entries)
+        buf.append('</section>\n')
+    buf.append(HTML_TAIL)
+    return write_html("".join(buf).encode("utf-8"), "%s/index.html" % html_path)
+
+def generate_html(orth: str, entries: List[DictEntry]):
+    # build the page in memory so it can be written with a single call
+    buf = [HTML_HEAD]
+    generate_content(buf, orth, entries)
+    buf.append(HTML_TAIL)
+    return "".join(buf).encode("utf-8")
+
+def generate_content(buf: List[str], orth: str, entries: List[DictEntry]):
+    orth = escape(orth)
+    for index, entry in enumerate(entries, start=1):
+        # title
+        if len(entries) == 1:
+            buf.append(f'  <h3>{orth}</h3>\n')
         else:
-            output.senses.append(sense)
-        return
-
-    # process leaf
-    for child in element:
-        collect(child, output, prefix)
-
-    # pop
-    prefix.pop()
-
-def generate_orth(orth: str, entries: List[DictEntry], html_path: str):
-    converted = orth.replace(" ", "_")
-    if orth == converted:
-        return generate_html(orth, entries, "%s/%s.html" % (html_path, orth))
-    else:
-        n1 = generate_html(orth, entries, "%s/%s.html" % (html_path, orth))
-        n2 = generate_html(orth, entries, "%s/%s.html" % (html_path, converted))
-        return n1 or n2
-
-# waring: under windows some files (e.g., con.html) cannot be created
-def generate_html(orth: str, entries: List[DictEntry], filename: str):
+            buf.append(f'  <h3>{orth}<sup>{index}</sup></h3>\n')
+        # pronunciation
+        if entry.pron:
+            buf.append('  <span class="pron">' + ' '.join([escape(pron) for pron in entry.pron]) + '</span><br/>\n')
+        # pos & gen
+        pos_gen = ""
+        if entry.pos:
+            pos_gen += '<span class="pos">' + ' '.join(['[%s]' % escape(pos) for pos in entry.pos]) + '</span>'
+        if entry.pos and entry.gen:
+            pos_gen += ' '
+        if entry.gen:
+            pos_gen += '<span class="gen">' + ' '.join([escape(gen) for gen in entry.gen]) + '</span>'
+        # senses
+        if entry.senses:
+            for sense_index, sense in enumerate(entry.senses, start=1):
+                buf.append(f'  <b>{sense_index}. </b>{pos_gen}<br/>\n')
+                if sense.quotes:
+                    for quote in sense.quotes:
+                        buf.append(f'  <p class="quote">{escape(quote)}</p>\n')
+                if sense.defs:
+                    for defn in sense.defs:
+                        buf.append(f'  <p class="def">- {escape(defn)}</p>\n')
+
+# waring: under windows some files (e.g., con.html) cannot be created,
+# use --single-file to avoid them
+def write_html(data: bytes, filename: str):
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write('<!doctype html>\n')
-            f.write('<html>\n')
-            f.write('<head>\n')
-            f.write('  <meta charset="utf-8">\n')
-            f.write('  <meta name="viewport" content="width=device-width, initial-scale=1.0">\n')
-            f.write('  <title>FreeDicts</title>\n')
-            f.write('  <link rel="stylesheet" href="dict.css">\n')
-            f.write('  <link rel="icon" href="../favicon.ico">\n')
-            f.write('</head>\n')
-            f.write('<body>\n')
-
-            # content
-            for index, entry in enumerate(entries, start=1):
-                # title
-                if len(entries) == 1:
-                    f.write(f'  <h3>{orth}</h3>\n')
-                else:
-                    f.write(f'  <h3>{orth}<sup>{index}</sup></h3>\n')
-                # pronunciation
-                if entry.pron:
-                    f.write('  <span class="pron">' + ' '.join(entry.pron) + '</span><br/>\n')
-                # pos & gen
-                pos_gen = ""
-                if entry.pos:
-                    pos_gen += '<span class="pos">' + ' '.join(['[%s]' % pos for pos in entry.pos]) + '</span>'
-                if entry.pos and entry.gen:
-                    pos_gen += ' '
-                if entry.gen:
-                    pos_gen += '<span class="gen">' + ' '.join(entry.gen) + '</span>'
-                # senses
-                if entry.senses:
-                    for sense_index, sense in enumerate(entry.senses, start=1):
-                        f.write(f'  <b>{sense_index}. </b>{pos_gen}<br/>\n')
-                        if sense.quotes:
-                            for quote in sense.quotes:
-                                f.write(f'  <p class="quote">{quote}</p>\n')
-                        if sense.defs:
-                            for defn in sense.defs:
-                                f.write(f'  <p class="def">- {defn}</p>\n')
-            f.write('</body>\n')
-            f.write('</html>\n')
+        with open(filename, "wb") as f:
+            f.write(data)
             return 1
     except (FileNotFoundError, OSError):
         sys.stderr.write("warn: failed to create file %s\n" % filename)
         return 0
 
+def process_dict(dict, single_file=False):
+    # create prefix
+    src_lang = dict["name"].split("-")[0]
+    dst_lang = dict["name"].split("-")[1]
+    pair = create_pair(src_lang, dst_lang)
+
+    for release in dict["releases"]:
+        if release["platform"] == "src":
+            url = release["URL"]
+            version = release["version"]
+            path = "data/freedict-%s-%s.tar.xz" % (pair, version)
+            temp_path = "temp/freedict-%s-%s" % (pair, version)
+            tei_path  = "%s/%s/%s.tei" % (temp_path, dict["name"], dict["name"])
+            html_path = "html/%s" % pair
+
+            # skip dict: html of this version already generated
+            done = "%s/.done-%s%s" % (html_path, version, "-single" if single_file else "")
+            if os.path.isfile(done):
+                continue
+
+            # download dict
+            if os.path.isfile(path):
+                pass # dict with specific version exists
+            else:
+                http_download(url, path)
+                sys.stderr.write("%s\n" % path)
+
+            # extract (into a scratch directory that is moved into place when
+            # complete, so an interrupted run never leaves a partial tei file)
+            if not os.path.isfile(tei_path):
+                scratch_path = "%s.part" % temp_path
+                shutil.rmtree(scratch_path, ignore_errors=True)
+                with tarfile.open(path, "r:xz") as tar:
+                    # only the tei file and its includes (for en-pl) are needed;
+                    # iterate instead of getmembers() to decompress in one pass
+                    for member in tar:
+                        if member.name.endswith((".tei", ".xml")):
+                            tar.extract(member, path=scratch_path)
+                shutil.rmtree(temp_path, ignore_errors=True)
+                os.replace(scratch_path, temp_path)
+
+            # create output dir
+            os.makedirs(html_path, exist_ok=True)
+
+            entries: Dict[str, List[DictEntry]] = collections.defaultdict(list)
+
+            for element in iterparse_entries(tei_path):
+                # collect data
+                entry = DictEntry()
+                collect(element, entry)
+
+                # mergy entries by orth
+                for orth in entry.orth:
+                    entries[orth].append(entry)
+
+            # generate html
+            sys.stderr.write("generate %s\n" % html_path)
+            total = len(entries)
+            if single_file:
+                succ = generate_single_file(entries, html_path) * total
+            else:
+                succ = generate_orths(entries, html_path)
+            sys.stderr.write(" - %s: %.2f%% entries generated\n" % (pair, succ * 100.0 / total))
+
+            # copy css
+            shutil.copy("dict.css", "%s/dict.css" % html_path)
+
+            # mark as done
+            open(done, "w").close()
+
 if __name__ == "__main__":
-    if len(sys.argv) == 1:
+    parser = argparse.ArgumentParser(prog="freedict-generator-lite.py")
+    parser.add_argument("-f", dest="database", metavar="freedict-database.json",
+                        help="use a local database instead of downloading it")
+    parser.add_argument("--single-file", action="store_true",
+                        help="write one index.html per dictionary instead of one file per headword; "
+                             "headwords are reached as <pair>/index.html#<headword> (spaces as _), "
+                             "which the shipped html/index.html does not link to")
+    args = parser.parse_args()
+
+    if args.database is None:
         database = get_freedict_database()
-    elif len(sys.argv) == 3 and sys.argv[1] == "-f":
-        database = load_freedict_database(sys.argv[2])
     else:
-        sys.stderr.write("usage: python freedict-generator-lite.py [-f freedict-database.json]")
-        sys.exit(-1)
+        database = load_freedict_database(args.database)
 
-    dicts = {}
+    dicts = []
     for dict in database:
         # skip freedict tools
         if "software" in dict:
@@ -292,65 +441,8 @@ if __name__ == "__main__":
         if dict["name"].endswith("ast"):
             continue
 
-        # create prefix
-        src_lang = dict["name"].split("-")[0]
-        dst_lang = dict["name"].split("-")[1]
-        pair = create_pair(src_lang, dst_lang)
-
-        for release in dict["releases"]:
-            if release["platform"] == "src":
-                tei_path  = "temp/%s/%s.tei" % (dict["name"], dict["name"])
-                base_path = "temp/%s" % dict["name"]
-                html_path = "html/%s" % pair
-                dicts[pair] = {}
-
-                # download dict
-                url = release["URL"]
-                version = release["version"]
-                path = "data/freedict-%s-%s.tar.xz" % (pair, version)
-                if os.path.isfile(path):
-                    pass # dict with specific version exists
-                else:
-                    http_download(url, path)
-                    sys.stderr.write("%s\n" % path)
-
-                # extract
-                with tarfile.open(path, "r:xz") as tar:
-                    tar.extractall(path="temp")
-
-                # create output dir
-                os.makedirs(html_path, exist_ok=True)
-
-                # preprocess
-                tree = ElementTree.parse(tei_path)
-                root = tree.getroot()
-                text = root.find("tei:text", {"tei": "http://www.tei-c.org/ns/1.0"})
-                body = text.find("tei:body", {"tei": "http://www.tei-c.org/ns/1.0"})
-                body = preprocess(body, base_path)
-
-                entries: Dict[str, List[DictEntry]] = {}
-
-                for element in body:
-                    if element.tag == "entry":
-                        # collect data
-                        entry = DictEntry()
-                        collect(element, entry, [])
-
-                        # mergy entries by orth
-                        if entry.orth is not None:
-                            for orth in entry.orth:
-                                if orth in entries:
-                                    entries[orth].append(entry)
-                                else:
-                                    entries[orth] = [entry]
-
-                # generate html
-                sys.stderr.write("generate %s\n" % html_path)
-                total = len(entries)
-                succ = 0
-                for orth in sorted(entries.keys()):
-                    succ += generate_orth(orth, entries[orth], html_path)
-                sys.stderr.write(" - %s: %.2f%% entries generated\n" % (pair, succ * 100.0 / total))
-
-                # copy css
-                shutil.copy("dict.css", "%s/dict.css" % html_path)
\ No newline at end of file
+        dicts.append(dict)
+
+    # dictionaries are independent, process them in parallel
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        list(executor.map(functools.partial(process_dict, single_file=args.single_file), dicts))
\ No newline at end of file